@@ -1,33 +1,52 @@
-import json
+import math
 import time
+import warnings
 import logging
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from io import BytesIO
+from itertools import islice
 from typing import Union
 from urllib.parse import urlencode
 from uuid import uuid4
 from zipfile import ZipFile
 
+import orjson
 import requests
 from openpyxl import load_workbook
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from gosuslugi_api.utils import Licenses
-from gosuslugi_api.consts import REGION_CODES_AND_NAMES
+from gosuslugi_api.consts import (
+    REGION_CODES_AND_NAMES, BASE_URL, LICENSE_UID_URL,
+    DOWNLOAD_LICENSES_INFO_URL, ORGANIZATIONS_URL, ORGANIZATION_URL,
+    HOUSE_CODE_URL, HOME_MANAGEMENTS_URL, HOME_MANAGEMENT_URL, HOUSE_INFO_URL)
 from gosuslugi_api.exceptions import RegionCodeIsAbsentError
 
 
 logger = logging.getLogger(__name__)
 
 
-def _get_body_for_logging(body: Union[bytes, str]) -> str:
-    try:
-        if isinstance(body, bytes):
-            return (b' BODY: ' + body).decode('utf-8')
-        elif isinstance(body, str):
-            return ' BODY: ' + body
-        else:
+class _LazyBody:
+
+    __slots__ = ('body',)
+
+    def __init__(self, body: Union[bytes, str, dict, list, None]):
+        self.body = body
+
+    def __str__(self) -> str:
+        try:
+            if isinstance(self.body, bytes):
+                return (b' BODY: ' + self.body).decode('utf-8')
+            elif isinstance(self.body, str):
+                return ' BODY: ' + self.body
+            elif isinstance(self.body, (dict, list)):
+                return ' BODY: ' + str(self.body)
+            else:
+                return ''
+        except UnicodeDecodeError:
             return ''
-    except UnicodeDecodeError:
-        return ''
 
 
 def _get_duration_for_logging(duration: str) -> str:
@@ -37,6 +56,14 @@ def _get_duration_for_logging(duration: str) -> str:
         return ''
 
 
+def _warn_keep_alive_deprecated(keep_alive):
+    if keep_alive is not None:
+        warnings.warn(
+            'keep_alive is deprecated and ignored, connections are always '
+            'reused; call close() to release them',
+            DeprecationWarning, stacklevel=3)
+
+
 class HTTPClient:
 
     GET_HTTP_METHOD = 'GET'
@@ -50,75 +77,89 @@ class HTTPClient:
         LOG_REQUEST_TEMPLATE
         + ' - HTTP %(status_code)s%(response_body)s%(duration)s')
 
-    def __init__(self, timeout=3, keep_alive=False, default_headers=None):
+    def __init__(self, timeout=3, keep_alive=None, default_headers=None, *,
+                 pool_size=32, max_retries=3):
+        _warn_keep_alive_deprecated(keep_alive)
         self.timeout = timeout
-        self.keep_alive = keep_alive
-        self.default_headers = default_headers or {}
-        self._session = None
+        self._session = requests.Session()
+        self._session.headers.update(default_headers or {})
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=max_retries, read=False, status=0,
+                backoff_factor=0.2))
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+    @property
+    def default_headers(self):
+        return self._session.headers
+
+    @default_headers.setter
+    def default_headers(self, headers):
+        self._session.headers = requests.utils.default_headers()
+        self._session.headers.update(headers or {})
 
     def _log_request(
-            self, method, url, body, duration=None, log_method=logger.info):
+            self, method, url, body, duration=None, log_level=logging.INFO,
+            exc_info=False):
+        if not logger.isEnabledFor(log_level):
+            return
         message_params = {
             'method': method, 'url': url,
-            'request_body': _get_body_for_logging(body),
+            'request_body': _LazyBody(body),
             'duration': _get_duration_for_logging(duration)}
-        log_method(self.LOG_REQUEST_TEMPLATE, message_params)
-
-    def _log_response(self, response, duration, log_method=logger.info):
+        logger.log(
+            log_level, self.LOG_REQUEST_TEMPLATE, message_params,
+            exc_info=exc_info)
+
+    def _log_response(
+            self, response, duration, log_level=logging.INFO,
+            with_body=True):
+        if not logger.isEnabledFor(log_level):
+            return
+        response_body = response.content if with_body else None
         message_params = {
             'method': response.request.method,
             'url': response.request.url,
-            'request_body': _get_body_for_logging(response.request.body),
+            'request_body': _LazyBody(response.request.body),
             'status_code': response.status_code,
-            'response_body': _get_body_for_logging(response.content),
+            'response_body': _LazyBody(response_body),
             'duration': _get_duration_for_logging(duration)}
-        log_method(self.LOG_RESPONSE_TEMPLATE, message_params)
+        logger.log(log_level, self.LOG_RESPONSE_TEMPLATE, message_params)
 
     def _make_request(self, method, url, **kwargs) -> requests.Response:
         kwargs.setdefault('timeout', self.timeout)
-        session = self.session
-        timeout = kwargs.pop('timeout', self.timeout)
-
-        headers = self.default_headers.copy()
-        headers.update(kwargs.pop('headers', {}))
-
-        request = requests.Request(method, url, headers=headers, **kwargs)
-        prepared_request = request.prepare()
-        self._log_request(method, url, prepared_request.body)
+        request_body = kwargs.get('data', kwargs.get('json'))
+        self._log_request(method, url, request_body)
         start_time = time.time()
         try:
-            response = session.send(prepared_request, timeout=timeout)
+            response = self._session.request(method, url, **kwargs)
             duration = time.time() - start_time
             if response.status_code >= 400:
-                log_method = logging.error
+                log_level = logging.ERROR
             else:
-                log_method = logging.debug
+                log_level = logging.DEBUG
 
             self._log_response(
-                response, duration=duration, log_method=log_method)
+                response, duration=duration, log_level=log_level,
+                with_body=not kwargs.get('stream', False))
             return response
         except requests.exceptions.RequestException as e:
             duration = time.time() - start_time
-            if e.response:
+            if e.response is not None:
                 self._log_response(
-                    e.response, duration=duration, log_method=logging.error)
+                    e.response, duration=duration, log_level=logging.ERROR)
             else:
+                if e.request is not None:
+                    request_body = e.request.body
                 self._log_request(
-                    method, url, prepared_request.body,
-                    log_method=logging.exception)
+                    method, url, request_body,
+                    log_level=logging.ERROR, exc_info=True)
             raise
-        finally:
-            if not self.keep_alive:
-                session.close()
 
-    @property
-    def session(self) -> requests.Session:
-        if self.keep_alive:
-            if not self._session:
-                self._session = requests.Session()
-            return self._session
-        else:
-            return requests.Session()
+    def close(self):
+        self._session.close()
 
     def get(self, url, params=None, **kwargs) -> requests.Response:
         if params:
@@ -143,114 +184,159 @@ class GosUslugiAPIClient:
 
     REGION_CODES_AND_NAMES = REGION_CODES_AND_NAMES
 
-    BASE_URL = 'https://dom.gosuslugi.ru/'
-    LICENSE_UID_URL = (
-        f'{BASE_URL}licenses/api/rest/services/public/'
-        'licenses/region-license-xls/{}')
-    DOWNLOAD_LICENSES_INFO_URL = (
-        f'{BASE_URL}filestore/publicDownloadAllFilesServlet?'
-        'context=licenses&uids={uid}&zipFileName={file_name}.zip')
-    ORGANIZATIONS_URL = (
-        f'{BASE_URL}ppa/api/rest/services/ppa/'
-        'organizations/chooser/search;page=1;itemsPerPage=11')
-    ORGANIZATION_URL = (
-        f'{BASE_URL}ppa/api/rest/services/ppa/public/organizations'
-        '/orgByGuid?organizationGuid={}')
-    HOUSE_CODE_URL = (
-        f'{BASE_URL}nsi/api/rest/services/nsi/fias/v4/houses?'
-        'houseCodes={}&includeDuplicates=false&actual={}')
-    HOME_MANAGEMENTS_URL = (
-        f'{BASE_URL}homemanagement/api/rest/services/houses/public/'
-        'searchByOrg?pageIndex={page_number}&elementsPerPage={elems_per_page}')
-    HOME_MANAGEMENT_URL = (
-        f'{BASE_URL}homemanagement/api/rest/services/'
-        'houses/public/1/{}/')
-    HOUSE_INFO_URL = (
-        f'{BASE_URL}information-disclosure/api/rest/services/'
-        'disclosures/mkd/house-info?houseGuid={}')
-
-    ORGANIZATION_PAYLOAD_PART_1 = (
-        '{"sortCriteriaList":[{"sortedBy":"organizationType",'
-        '"ascending":false},'
-        '{"sortedBy":"shortName","ascending":true},{"sortedBy":"fullName",'
-        '"ascending":true},{"sortedBy":"parentKpp","ascending":true},'
-        '{"sortedBy":"kpp","ascending":true}],"organizationStatuses":'
-        '{"coll":["REGISTERED"],"operand":"OR"},"organizationTypes":'
-        '{"coll":["B","L","A"],"operand":"OR"},"subordinationOrgTypeList":'
-        '{"coll":["HEAD","BRANCH"],"operand":"OR"},"commonSearchString":"')
-    ORGANIZATION_PAYLOAD_PART_2 = (
-        '","roleConstraints":{"coll":[{"roleCode":"1",'
-        '"roleStatuses":["APPROVED"]},{"roleCode":"19","roleStatuses":'
-        '["APPROVED"]},{"roleCode":"20","roleStatuses":["APPROVED"]},'
-        '{"roleCode":"22","roleStatuses":["APPROVED"]},'
-        '{"roleCode":"21","roleStatuses":["APPROVED"]}],"operand":"OR"}}')
-
-    def __init__(self, timeout=5, keep_alive=False):
-        self._region_codes = set(self.REGION_CODES_AND_NAMES)
-        self._http_client = HTTPClient(timeout=timeout, keep_alive=keep_alive)
+    BASE_URL = BASE_URL
+    LICENSE_UID_URL = LICENSE_UID_URL
+    DOWNLOAD_LICENSES_INFO_URL = DOWNLOAD_LICENSES_INFO_URL
+    ORGANIZATIONS_URL = ORGANIZATIONS_URL
+    ORGANIZATION_URL = ORGANIZATION_URL
+    HOUSE_CODE_URL = HOUSE_CODE_URL
+    HOME_MANAGEMENTS_URL = HOME_MANAGEMENTS_URL
+    HOME_MANAGEMENT_URL = HOME_MANAGEMENT_URL
+    HOUSE_INFO_URL = HOUSE_INFO_URL
+
+    ORGANIZATION_PAYLOAD_TEMPLATE = {
+        'sortCriteriaList': [
+            {'sortedBy': 'organizationType', 'ascending': False},
+            {'sortedBy': 'shortName', 'ascending': True},
+            {'sortedBy': 'fullName', 'ascending': True},
+            {'sortedBy': 'parentKpp', 'ascending': True},
+            {'sortedBy': 'kpp', 'ascending': True}],
+        'organizationStatuses': {'coll': ['REGISTERED'], 'operand': 'OR'},
+        'organizationTypes': {'coll': ['B', 'L', 'A'], 'operand': 'OR'},
+        'subordinationOrgTypeList': {
+            'coll': ['HEAD', 'BRANCH'], 'operand': 'OR'},
+        'commonSearchString': '',
+        'roleConstraints': {
+            'coll': [
+                {'roleCode': '1', 'roleStatuses': ['APPROVED']},
+                {'roleCode': '19', 'roleStatuses': ['APPROVED']},
+                {'roleCode': '20', 'roleStatuses': ['APPROVED']},
+                {'roleCode': '22', 'roleStatuses': ['APPROVED']},
+                {'roleCode': '21', 'roleStatuses': ['APPROVED']}],
+            'operand': 'OR'}}
+
+    def __init__(self, timeout=5, keep_alive=None, *, pool_size=32,
+                 max_workers=16, max_downloads=4):
+        _warn_keep_alive_deprecated(keep_alive)
+        if max_downloads < 1:
+            raise ValueError('max_downloads must be at least 1')
+        self.max_workers = max_workers
+        self.max_downloads = max_downloads
+        self._license_uid_urls = {
+            region_code: self.LICENSE_UID_URL.format(f'{region_code:02d}')
+            for region_code in self.REGION_CODES_AND_NAMES}
+        self._actual_houses_url = self.HOUSE_CODE_URL.format('{}', 'true')
+        self._not_actual_houses_url = self.HOUSE_CODE_URL.format(
+            '{}', 'false')
+        self._region_codes = frozenset(self.REGION_CODES_AND_NAMES)
+        self._http_client = HTTPClient(timeout=timeout, pool_size=pool_size)
+
+    def close(self):
+        self._http_client.close()
 
     def _get_response_body(self, response: requests.Response):
-        status_code = response.status_code
-        if status_code >= 400:
+        if response.status_code >= 400:
             response.raise_for_status()
-        elif not response.content:
+        content = response.content
+        if not content:
             return ''
-        else:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
             return response.json()
 
-    def _get_license_uids(self, region_codes):
-        license_uids = {}
-        for region_code in region_codes:
-            if region_code < 10:
-                url_region_code = f'0{region_code}'
-            else:
-                url_region_code = region_code
-            response = self._http_client.get(
-                self.LICENSE_UID_URL.format(url_region_code))
-            if response.status_code != 200:
-                logger.error(f'uid for {region_code} was not obtained')
-            else:
-                license_uids[
-                    self.REGION_CODES_AND_NAMES[region_code]] = response.text
-
-        return license_uids
-
-    def _get_licenses_info(self, license_uids):
-        licenses_info = {}
-        for region_name, license_uid in license_uids.items():
-            response = requests.get(
-                self.DOWNLOAD_LICENSES_INFO_URL.format(
-                    uid=license_uid, file_name=region_name))
+    def _prepare_region_requests(self, region_codes):
+        region_codes = list(region_codes)
+        absent_region_codes = set(region_codes) - self._region_codes
+        if absent_region_codes:
+            absent_region_codes = sorted(
+                absent_region_codes,
+                key=lambda region_code: (type(region_code).__name__,
+                                         region_code))
+            raise RegionCodeIsAbsentError(
+                'Region codes {} are absent in reference'.format(
+                    ', '.join(map(str, absent_region_codes))))
+
+        return [
+            (region_code, self._license_uid_urls[region_code],
+             self.REGION_CODES_AND_NAMES[region_code])
+            for region_code in region_codes]
+
+    def _get_license_uid(self, region_code, url):
+        response = self._http_client.get(url)
+        if response.status_code != 200:
+            logger.error('uid for %s was not obtained', region_code)
+            return None
+        return response.text
+
+    def _get_licenses_info(self, region_name, license_uid):
+        url = self.DOWNLOAD_LICENSES_INFO_URL.format(
+            uid=license_uid, file_name=region_name)
+        with self._http_client.get(url, stream=True) as response:
             if response.status_code != 200:
                 logger.error(
-                    f'License info for {region_name} was not obtained')
-            else:
-                licenses_info[region_name] = response.content
-
-        return licenses_info
-
-    def _get_workbooks_from_licenses_info(self, licenses_info):
-        for region_name, zip_content in licenses_info.items():
-            zip_file = ZipFile(BytesIO(zip_content))
-            for name in zip_file.namelist():
-                if name.endswith('.xlsx'):
-                    xlsx_content = BytesIO(zip_file.open(name).read())
-                    workbook = load_workbook(xlsx_content, read_only=True)
-                    yield Licenses(region_name=region_name, workbook=workbook)
+                    'License info for %s was not obtained', region_name)
+                return None
+            return BytesIO(response.content)
+
+    def _get_workbooks_from_licenses_info(self, region_name, licenses_info):
+        zip_file = ZipFile(licenses_info)
+        for name in zip_file.namelist():
+            if name.endswith('.xlsx'):
+                workbook = load_workbook(zip_file.open(name), read_only=True)
+                yield Licenses(region_name=region_name, workbook=workbook)
+
+    def _get_licenses(self, region_requests):
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        uid_futures = {}
+        download_futures = {}
+        try:
+            region_requests = deque(region_requests)
+            obtained_uids = deque()
+            while (region_requests or uid_futures or download_futures
+                   or obtained_uids):
+                while region_requests and (
+                        len(uid_futures) < self.max_workers):
+                    region_code, url, region_name = region_requests.popleft()
+                    future = executor.submit(
+                        self._get_license_uid, region_code, url)
+                    uid_futures[future] = region_name
+                while obtained_uids and (
+                        len(download_futures) < self.max_downloads):
+                    region_name, license_uid = obtained_uids.popleft()
+                    future = executor.submit(
+                        self._get_licenses_info, region_name, license_uid)
+                    download_futures[future] = region_name
+
+                done, _ = wait(
+                    [*uid_futures, *download_futures],
+                    return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in uid_futures:
+                        region_name = uid_futures.pop(future)
+                        license_uid = future.result()
+                        if license_uid is not None:
+                            obtained_uids.append((region_name, license_uid))
+                        continue
+
+                    region_name = download_futures.pop(future)
+                    licenses_info = future.result()
+                    if licenses_info is not None:
+                        yield from self._get_workbooks_from_licenses_info(
+                            region_name, licenses_info)
+        finally:
+            for future in [*uid_futures, *download_futures]:
+                future.cancel()
+            executor.shutdown(wait=False)
 
     def get_licenses(self, region_codes):
-        for region_code in region_codes:
-            if region_code not in REGION_CODES_AND_NAMES:
-                raise RegionCodeIsAbsentError(
-                    f'Region code {region_code} is absent in reference')
-
-        license_uids = self._get_license_uids(region_codes)
-        licenses_info = self._get_licenses_info(license_uids)
-        return self._get_workbooks_from_licenses_info(licenses_info)
+        region_requests = self._prepare_region_requests(region_codes)
+        return self._get_licenses(region_requests)
 
     def get_organizations(self, inn):
-        payload = self.ORGANIZATION_PAYLOAD_PART_1 + str(inn)
-        payload += self.ORGANIZATION_PAYLOAD_PART_2
+        payload = orjson.dumps(
+            {**self.ORGANIZATION_PAYLOAD_TEMPLATE,
+             'commonSearchString': str(inn)})
 
         url = self.ORGANIZATIONS_URL
         headers = {'Content-Type': 'application/json'}
@@ -262,31 +348,49 @@ class GosUslugiAPIClient:
         return self._get_response_body(self._http_client.get(url))
 
     def get_not_actual_houses(self, house_code):
-        url = self.HOUSE_CODE_URL.format(house_code, 'false')
+        url = self._not_actual_houses_url.format(house_code)
         return self._get_response_body(self._http_client.get(url))
 
     def get_actual_houses(self, house_code):
-        url = self.HOUSE_CODE_URL.format(house_code, 'true')
+        url = self._actual_houses_url.format(house_code)
         return self._get_response_body(self._http_client.get(url))
 
-    def get_home_managements(self, org_guid, start_page=1, per_page=1):
+    def _get_home_managements_page(self, page_number, per_page, payload):
         url = self.HOME_MANAGEMENTS_URL.format(
-            page_number=start_page, elems_per_page=per_page)
-        payload = json.dumps({'organizationGuid': org_guid, 'calcCount': True})
+            page_number=page_number, elems_per_page=per_page)
         headers = {'Content-Type': 'application/json'}
-        response = requests.post(url, data=payload, headers=headers)
-        json_body = self._get_response_body(response)
+        response = self._http_client.post(url, data=payload, headers=headers)
+        return self._get_response_body(response)
+
+    def get_home_managements(self, org_guid, start_page=1, per_page=1):
+        payload = orjson.dumps(
+            {'organizationGuid': org_guid, 'calcCount': True})
+        json_body = self._get_home_managements_page(
+            start_page, per_page, payload)
         yield json_body
         objects_number = json_body['total'] or 0
-        for page_num in range(2, objects_number + 1):
-            url = self.HOME_MANAGEMENTS_URL.format(
-                page_number=page_num, elems_per_page=per_page)
-            response = requests.post(url, data=payload, headers=headers)
-            yield self._get_response_body(response)
+        pages_number = math.ceil(objects_number / per_page)
+        page_numbers = iter(range(start_page + 1, pages_number + 1))
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        page_futures = deque()
+        try:
+            while True:
+                free_slots = self.max_workers - len(page_futures)
+                for page_number in islice(page_numbers, free_slots):
+                    page_futures.append(executor.submit(
+                        self._get_home_managements_page,
+                        page_number, per_page, payload))
+                if not page_futures:
+                    break
+                yield page_futures.popleft().result()
+        finally:
+            for future in page_futures:
+                future.cancel()
+            executor.shutdown(wait=False)
 
     def get_home_management(self, home_management_guid):
         url = self.HOME_MANAGEMENT_URL.format(home_management_guid)
-        return self._get_response_body(requests.get(url))
+        return self._get_response_body(self._http_client.get(url))
 
     def get_house_info(self, house_guid):
         headers = {
@@ -294,4 +398,5 @@ class GosUslugiAPIClient:
             'Request-GUID': str(uuid4())
         }
         url = self.HOUSE_INFO_URL.format(house_guid)
-        return self._get_response_body(requests.get(url, headers=headers))
+        response = self._http_client.get(url, headers=headers)
+        return self._get_response_body(response)
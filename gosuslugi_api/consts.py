@@ -84,4 +84,31 @@ REGION_CODES_AND_NAMES = {
     89: 'Ямало-Ненецкий автономный округ',
     91: 'Республика Крым',
     92: 'Севастополь',
-    99: 'Иные территории, включая город и космодром Байконур'}
\ No newline at end of file
+    99: 'Иные территории, включая город и космодром Байконур'}
+
+
+BASE_URL = 'https://dom.gosuslugi.ru/'
+LICENSE_UID_URL = (
+    f'{BASE_URL}licenses/api/rest/services/public/'
+    'licenses/region-license-xls/{}')
+DOWNLOAD_LICENSES_INFO_URL = (
+    f'{BASE_URL}filestore/publicDownloadAllFilesServlet?'
+    'context=licenses&uids={uid}&zipFileName={file_name}.zip')
+ORGANIZATIONS_URL = (
+    f'{BASE_URL}ppa/api/rest/services/ppa/'
+    'organizations/chooser/search;page=1;itemsPerPage=11')
+ORGANIZATION_URL = (
+    f'{BASE_URL}ppa/api/rest/services/ppa/public/organizations'
+    '/orgByGuid?organizationGuid={}')
+HOUSE_CODE_URL = (
+    f'{BASE_URL}nsi/api/rest/services/nsi/fias/v4/houses?'
+    'houseCodes={}&includeDuplicates=false&actual={}')
+HOME_MANAGEMENTS_URL = (
+    f'{BASE_URL}homemanagement/api/rest/services/houses/public/'
+    'searchByOrg?pageIndex={page_number}&elementsPerPage={elems_per_page}')
+HOME_MANAGEMENT_URL = (
+    f'{BASE_URL}homemanagement/api/rest/services/'
+    'houses/public/1/{}/')
+HOUSE_INFO_URL = (
+    f'{BASE_URL}information-disclosure/api/rest/services/'
+    'disclosures/mkd/house-info?houseGuid={}')
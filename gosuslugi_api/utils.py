@@ -1,10 +1,45 @@
 from datetime import datetime
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 
 from gosuslugi_api.exceptions import WorksheetAbsentError
 
 
+DATETIME_FORMAT = '%d.%m.%Y %H:%M:%S'
+DATE_FORMAT = '%d.%m.%Y'
+
+_parse_dt = datetime.strptime
+
+
+def _is_ascii_digits(*parts):
+    return all(part.isascii() and part.isdigit() for part in parts)
+
+
+def _parse_date(value):
+    day, month, year = value[:2], value[3:5], value[6:]
+    if (len(value) == 10 and value[2] == value[5] == '.'
+            and _is_ascii_digits(day, month, year)):
+        try:
+            return datetime(int(year), int(month), int(day))
+        except ValueError:
+            pass
+    return _parse_dt(value, DATE_FORMAT)
+
+
+def _parse_datetime(value):
+    parts = (
+        value[6:10], value[3:5], value[:2],
+        value[11:13], value[14:16], value[17:])
+    if (len(value) == 19 and value[2] == value[5] == '.'
+            and value[10] == ' ' and value[13] == value[16] == ':'
+            and _is_ascii_digits(*parts)):
+        try:
+            return datetime(*map(int, parts))
+        except ValueError:
+            pass
+    return _parse_dt(value, DATETIME_FORMAT)
+
+
 class Licenses:
 
     def __init__(self, region_name, workbook):
@@ -16,25 +51,21 @@ class Licenses:
         worksheets = self.workbook.worksheets
         if not worksheets:
             raise WorksheetAbsentError('There is no any worksheet')
-        rows = worksheets[0].rows
-        _skip_header_in_license_rows(rows)
-        for row in rows:
-            yield _make_gis_gkh_row(row)
+        rows = worksheets[0].iter_rows(values_only=True)
+        header_row_number = _skip_header_in_license_rows(rows)
+        house_fias_id_stub = ''
+        for row_number, row in enumerate(rows, start=header_row_number + 1):
+            yield LicensesFileRow(row_number, house_fias_id_stub, *row[:-2])
 
 
 def _skip_header_in_license_rows(license_rows):
-    for row in license_rows:
-        cell_value = row[0].value
-        if cell_value and cell_value.strip().lower() == 'номер лицензии':
+    row_number = 0
+    for row_number, row in enumerate(license_rows, start=1):
+        cell_value = row[0] if row else None
+        if (isinstance(cell_value, str)
+                and cell_value.strip().lower() == 'номер лицензии'):
             break
-
-
-def _make_gis_gkh_row(row):
-    row_number = row[0].row
-    values_from_all_cells = [cell.value for cell in row]
-    not_empty_values = values_from_all_cells[:-2]
-    house_fias_id_stub = ''
-    return LicensesFileRow(row_number, house_fias_id_stub, *not_empty_values)
+    return row_number
 
 
 @dataclass
@@ -72,20 +103,28 @@ class LicensesFileRow:
     active_license_status = 'действующая'
 
     def __post_init__(self):
-        for field_name, field_value in asdict(self).items():
+        for field_name in _LICENSES_FILE_ROW_FIELD_NAMES:
+            field_value = getattr(self, field_name)
             if isinstance(field_value, str):
                 field_value = field_value.strip().lower()
-            if field_name in self.datetime_format_fields:
+            if isinstance(field_value, datetime):
+                pass
+            elif field_name in _DATETIME_FORMAT_FIELDS:
                 if field_value:
-                    field_value = datetime.strptime(
-                        field_value, '%d.%m.%Y %H:%M:%S')
+                    field_value = _parse_datetime(field_value)
                 else:
                     field_value = datetime.max
-            if field_name in self.date_format_fields:
+            elif field_name in _DATE_FORMAT_FIELDS:
                 if field_value:
-                    field_value = datetime.strptime(field_value, '%d.%m.%Y')
+                    field_value = _parse_date(field_value)
                 else:
                     field_value = datetime.max
-            if field_name == 'is_information_in_register':
+            elif field_name == 'is_information_in_register':
                 field_value = field_value == self.in_register_mark
             setattr(self, field_name, field_value)
+
+
+_LICENSES_FILE_ROW_FIELD_NAMES = tuple(
+    field.name for field in fields(LicensesFileRow))
+_DATETIME_FORMAT_FIELDS = frozenset(LicensesFileRow.datetime_format_fields)
+_DATE_FORMAT_FIELDS = frozenset(LicensesFileRow.date_format_fields)
@@ -1,8 +1,10 @@
 from setuptools import setup, find_packages
 
 
-requirements = [
-    r.strip() for r in open('requirements.txt').readlines() if '#' not in r]
+with open('requirements.txt', encoding='utf-8') as requirements_file:
+    requirements = [
+        line.strip() for line in requirements_file
+        if line.strip() and not line.lstrip().startswith('#')]
 
 
 setup(